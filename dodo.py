@@ -6,7 +6,14 @@ import yaml
 import shutil
 import platform
 import semver
+import fasteners
+import subprocess
+import re
+import time
+import threading
+from contextlib import contextmanager
 from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from doit.tools import result_dep
 from doit import create_after, get_var
@@ -14,9 +21,13 @@ from doit import create_after, get_var
 from conans import __version__ as client_version
 from conans.client.conan_api import (Conan, default_manifest_folder)
 from conans.errors import ConanException
-from conans.model.ref import ConanFileReference
+from conans.model.ref import ConanFileReference, PackageReference
 from conans.client.tools import Git as ConanGit
+from conans.client.tools.env import environment_append, no_op
+from conans.util.files import decode_text
+from conans.paths import get_conan_user_home
 from conans.client.runner import ConanRunner
+from conans.client.output import ConanOutput
 
 import workspace.ubitrackWorkspace
 
@@ -26,6 +37,8 @@ if not semver.gte(client_version, '1.20.0', True):
 
 
 BUILD_CONFIG_NAME = os.path.join(os.curdir, "build_config.yml")
+WORKSPACE_INSTALL_FOLDER = os.path.join(os.curdir, "install")
+PIPELINE_STATE_NAME = "pipeline_state.yml"
 SKIP_PACKAGES = ["cmake_installer", ]
 
 # this should be configurable in build_spec
@@ -43,11 +56,44 @@ global_config = {"build_spec": get_var("build_spec", "default_build.yml"),
                  "profile_name": get_var("profile_name", "default"),
                  "workspace": get_var("workspace", "false").lower() == "true",
                  "deps_build_filter": get_var("deps_build_filter", "*"),
+                 "pipeline": get_var("pipeline", "false").lower() == "true",
+                 "pipeline_jobs": int(get_var("pipeline_jobs", "4")),
+                 "conan_cache": get_var("conan_cache", "shared").lower(),
+                 "download_cache": get_var("download_cache", None),
                  }
 
+if global_config["conan_cache"] not in ("shared", "locked", "isolated"):
+    raise RuntimeError("Invalid conan_cache '%s', use one of: shared, locked, isolated" % global_config["conan_cache"])
+
+# files copied from the default conan home into an isolated one when it is created
+CONAN_HOME_SEED = ["conan.conf", "settings.yml", "profiles", "hooks"]
+# remotes and credentials are synced from the default conan home on every run
+CONAN_HOME_SYNC = ["remotes.json", "registry.json", ".conan.db"]
+CONAN_CACHE_LOCK_NAME = "ubitrack_release_tools.lock"
+DEFAULT_CONAN_FOLDER = os.path.join(get_conan_user_home(), ".conan")
+
+# workspace_sync only runs when requested explicitly
+DOIT_CONFIG = {'default_tasks': ['load_config', 'package_worker_gen']}
+
+if global_config["conan_cache"] != "shared":
+    # concurrent runs from the same checkout must not share the generated build config and doit state,
+    # the doit state stays in the current directory as doit opens it before any task has run
+    BUILD_CONFIG_NAME = os.path.join(global_config["build_folder"], "build_config.yml")
+    dep_file_name = ".doit_%s.db" % re.sub(r"[^\w.-]", "_", os.path.normpath(global_config["build_folder"]))
+    DOIT_CONFIG['dep_file'] = os.path.join(os.curdir, dep_file_name)
+
 
 class Git(ConanGit):
 
+    def run(self, command):
+        # same as SCMBase.run, but without os.chdir() as the pipeline runs git from several threads
+        command = "%s %s%s" % (self.cmd_command, self._configure_ssl_verify, command)
+        if self._runner:
+            with environment_append({"LC_ALL": "en_US.UTF-8"}) if self._force_eng else no_op():
+                return self._runner(command, cwd=self.folder)
+        env = dict(os.environ, LC_ALL="en_US.UTF-8") if self._force_eng else None
+        return decode_text(subprocess.check_output(command, shell=True, cwd=self.folder, env=env)).strip()
+
     def update(self):
         if os.path.exists(self.folder):
             output = self.run("pull")
@@ -59,12 +105,67 @@ class Git(ConanGit):
                                  "attribute in the 'scm'" % self.folder)
 
 
+################################
+#
+#
+#
+################################
+def setup_conan_home(build_folder):
+    # with conan_cache=isolated every build_folder gets its own conan home,
+    # downloads are shared between the runs through the conan download cache
+    if global_config["conan_cache"] != "isolated":
+        return
+
+    conan_user_home = os.path.abspath(os.path.join(build_folder, "conan_home"))
+    conan_folder = os.path.join(conan_user_home, ".conan")
+
+    seed = []
+    if not os.path.exists(conan_folder):
+        print("Creating isolated conan home: %s" % conan_user_home)
+        os.makedirs(conan_folder)
+        seed = CONAN_HOME_SEED
+    for fname in seed + CONAN_HOME_SYNC:
+        src = os.path.join(DEFAULT_CONAN_FOLDER, fname)
+        if os.path.isdir(src):
+            shutil.copytree(src, os.path.join(conan_folder, fname))
+        elif os.path.isfile(src):
+            shutil.copy2(src, os.path.join(conan_folder, fname))
+
+    os.environ["CONAN_USER_HOME"] = conan_user_home
+
+    download_cache = global_config["download_cache"] or os.path.join(DEFAULT_CONAN_FOLDER, "download_cache")
+    if semver.gte(client_version, '1.24.0', True):
+        conan_api, client_cache, user_io = Conan.factory()
+        conan_api.config_set("storage.download_cache", os.path.abspath(download_cache))
+    else:
+        print("Shared download cache requires conan>=1.24.0, downloads are not shared between runs")
+
+
+# posix file locks are per process, so threads of one run take turns before taking it
+_conan_cache_thread_lock = threading.Lock()
+
+
+@contextmanager
+def conan_cache_lock():
+    # with conan_cache=locked, writes to the shared conan cache hold an inter-process lock
+    if global_config["conan_cache"] != "locked":
+        yield
+        return
+    lock_file = os.path.join(DEFAULT_CONAN_FOLDER, CONAN_CACHE_LOCK_NAME)
+    with _conan_cache_thread_lock, fasteners.InterProcessLock(lock_file):
+        yield
+
+
 ################################
 #
 #
 #
 ################################
 def load_config(config, build_folder):
+    if not os.path.exists(build_folder):
+        os.makedirs(build_folder)
+    setup_conan_home(build_folder)
+
     print("Loading configuration from: %s" % config)
     data = yaml.load(open(config).read())
     # use os.curdir if not an absolute path ?
@@ -85,6 +186,7 @@ def load_config(config, build_folder):
         "version": data["meta_package"]["version"],
         "user": data["meta_package"]["user"],
         "channel": data["meta_package"]["channel"],
+        "benchmarks": data.get("benchmarks"),
         }
     yaml.dump(build_config, open(BUILD_CONFIG_NAME, "w"))
 
@@ -140,7 +242,8 @@ def export_meta_package(meta_repo_folder, meta_commit_rev, config):
     channel = config['meta_package']['channel']
     conan_api, client_cache, user_io = Conan.factory()
 
-    conan_api.export(meta_repo_folder, name=name, channel=channel, version=version, user=user)
+    with conan_cache_lock():
+        conan_api.export(meta_repo_folder, name=name, channel=channel, version=version, user=user)
 
 
     try:
@@ -201,12 +304,14 @@ def export_package(user, channel, name, package_repo_folder, package_commit_rev)
     conan_api, client_cache, user_io = Conan.factory()
 
     try:
-        _, project_reference = conan_api.info(package_repo_folder)
+        with conan_cache_lock():
+            _, project_reference = conan_api.info(package_repo_folder)
         version = project_reference.version
     except:
         raise ValueError("missing conan version for: %s" % name)
 
-    conan_api.export(package_repo_folder, name=name, channel=channel, version=version, user=user)
+    with conan_cache_lock():
+        conan_api.export(package_repo_folder, name=name, channel=channel, version=version, user=user)
 
     try:
         conan_file_loc = os.path.join(package_repo_folder, "conanfile.py")
@@ -229,15 +334,21 @@ def export_package(user, channel, name, package_repo_folder, package_commit_rev)
 #
 #
 ################################
-def upload_package(name, version, user, channel, package_commit_rev, config):
+def upload_package(name, version, user, channel, package_commit_rev, config, separate_process=False):
     if global_config["upload"]:
-        conan_api, client_cache, user_io = Conan.factory()
         conan_repo = {v['name']: v['conanuser'] for v in config['dependencies']}
 
         ref = "%s/%s@%s/%s" % (name, version, user, channel)
         remote = conan_repo[name]
-        if remote is not None:
-            result = conan_api.upload(ref, confirm=True, remote_name=remote, policy="force-upload")
+        if remote is not None and separate_process:
+            # conan api calls change cwd and environment of the whole process
+            with conan_cache_lock():
+                subprocess.check_call([sys.executable, "-m", "conans.conan", "upload", ref,
+                                       "--confirm", "--force", "-r", remote])
+        elif remote is not None:
+            conan_api, client_cache, user_io = Conan.factory()
+            with conan_cache_lock():
+                result = conan_api.upload(ref, confirm=True, remote_name=remote, policy="force-upload")
     else:
         print("Upload of packages sources is disabled: %s" % name)
     
@@ -250,6 +361,83 @@ def upload_package(name, version, user, channel, package_commit_rev, config):
         }
 
 
+################################
+#
+#
+#
+################################
+def run_package_pipeline(dependencies, build_folder, config, wipe):
+    # clones and uploads run concurrently, all conan api calls are serialized through one worker
+    build_folder = os.path.abspath(build_folder)
+
+    # packages whose commit did not change since the last run are neither exported nor uploaded again
+    state_file = os.path.join(build_folder, PIPELINE_STATE_NAME)
+    previous = yaml.load(open(state_file).read()) if os.path.exists(state_file) else {}
+    previous = previous or {}
+
+    network_pool = ThreadPoolExecutor(max_workers=global_config["pipeline_jobs"])
+    conan_pool = ThreadPoolExecutor(max_workers=1)
+
+    packages = {}
+    completed = {}
+    running = {}
+    # exports must follow the dependency order of the profiles, finished clones wait here for their turn
+    prepared = {}
+    next_export = 0
+    try:
+        for dep_info in dependencies:
+            future = network_pool.submit(prepare_package_repository, dep_info["name"], dep_info["gitrepo"],
+                                         dep_info["gitbranch"], build_folder, config, wipe)
+            running[future] = ("prepare", dep_info, None)
+
+        # hand each finished stage on to the next one, no worker ever waits for another stage
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, dep_info, prepare_result = running.pop(future)
+                result = future.result()
+                name = dep_info["name"]
+                packages[name] = result
+
+                # for local workspace build do not export or upload the code to conan
+                if stage == "prepare" and not global_config["workspace"]:
+                    prepared[name] = result
+                elif stage == "export":
+                    future = network_pool.submit(upload_package, result["name"], result["version"],
+                                                 result["user"], result["channel"], prepare_result["commit_rev"],
+                                                 config, separate_process=True)
+                    running[future] = ("upload", dep_info, prepare_result)
+                elif stage == "upload":
+                    completed[name] = dict(result, uploaded=global_config["upload"])
+
+            while next_export < len(dependencies) and dependencies[next_export]["name"] in prepared:
+                dep_info = dependencies[next_export]
+                name = dep_info["name"]
+                next_export += 1
+                prepare_result = prepared.pop(name)
+                last = previous.get(name)
+                if last and last["commit_rev"] == prepare_result["commit_rev"] and \
+                        (last.get("uploaded") or not global_config["upload"]):
+                    print("Package is up to date, skip export and upload: %s" % name)
+                    packages[name] = completed[name] = last
+                    continue
+                future = conan_pool.submit(export_package, dep_info['conanuser'],
+                                           dep_info.get('conanchannel', "stable"), name,
+                                           prepare_result["package_repo_folder"], prepare_result["commit_rev"])
+                running[future] = ("export", dep_info, prepare_result)
+    finally:
+        # do not start any queued clone/export/upload after a failure
+        for future in running:
+            future.cancel()
+        network_pool.shutdown(wait=True)
+        conan_pool.shutdown(wait=True)
+        if not global_config["workspace"]:
+            previous.update(completed)
+            yaml.dump(previous, open(state_file, "w"))
+
+    return {'packages': packages}
+
+
 ################################
 #
 #
@@ -282,7 +470,8 @@ def build_release(deps, build_folder, config):
     "options": options}
     kw["profile_names"] = [profile_name,] if profile_name is not None else []
 
-    result = conan_api.create(package_repo_folder, **kw)
+    with conan_cache_lock():
+        result = conan_api.create(package_repo_folder, **kw)
 
     packages = []
     for info in result['installed']:
@@ -298,7 +487,163 @@ def build_release(deps, build_folder, config):
 #
 #
 ################################
-def deploy_release(packages, config):
+def run_benchmark_command(command, cwd, env):
+    # returns wall time in seconds and peak memory in MB
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, env=env)
+    if hasattr(os, "wait4"):
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        # ru_maxrss is reported in bytes on macOS and in kilobytes on linux
+        peak_memory = rusage.ru_maxrss / (1024.0 * 1024.0 if platform.system() == "Darwin" else 1024.0)
+    else:
+        process.wait()
+        peak_memory = None
+    elapsed = time.perf_counter() - start
+
+    if process.returncode != 0:
+        raise RuntimeError("benchmark command failed with exit code %d: %s" % (process.returncode, " ".join(command)))
+    return elapsed, peak_memory
+
+
+def is_older_version(candidate, version):
+    try:
+        return semver.lt(candidate, version, True)
+    except ValueError:
+        print("skip benchmark baseline with invalid version: %s" % candidate)
+        return False
+
+
+def load_benchmark_baseline(baseline_folder, name, version):
+    # results of the closest meta_package version before the current one
+    if not os.path.exists(baseline_folder):
+        return None, None
+
+    try:
+        semver.make_semver(version, True)
+    except ValueError:
+        print("meta_package version is not a valid semver, no benchmark baseline: %s" % version)
+        return None, None
+
+    prefix = "%s-" % name
+    versions = [f[len(prefix):-len(".yml")] for f in os.listdir(baseline_folder)
+                if f.startswith(prefix) and f.endswith(".yml")]
+    versions = [v for v in versions if is_older_version(v, version)]
+    if not versions:
+        return None, None
+
+    baseline_version = semver.sort(versions, True)[-1]
+    baseline_file = os.path.join(baseline_folder, "%s-%s.yml" % (name, baseline_version))
+    return baseline_version, yaml.load(open(baseline_file).read())
+
+
+def benchmark_release(packages, config):
+    benchmarks = config['benchmarks']
+    name = config['meta_package']['name']
+    version = config['meta_package']['version']
+
+    baseline_folder = benchmarks.get('baseline_folder', os.path.join(os.curdir, "benchmarks"))
+    max_time_ratio = benchmarks.get('max_time_ratio', 1.1)
+    max_memory_ratio = benchmarks.get('max_memory_ratio', 1.1)
+
+    conan_api, client_cache, user_io = Conan.factory()
+    conan_api.create_app()
+
+    # locate the package folders of the built packages, their libraries are needed at runtime
+    package_ids = benchmarks.get('package_ids', {})
+    used_packages = set(b['package'] for b in benchmarks.get('runs', []))
+    package_folders = {}
+    for package in packages:
+        reference = ConanFileReference.loads(package['reference'])
+        pids = package['package_ids']
+        if not pids:
+            continue
+        if reference.name in package_ids:
+            pids = [package_ids[reference.name]]
+        elif len(pids) > 1 and reference.name not in used_packages:
+            # only needed for the library search path, an ambiguous binary is left out
+            print("skip library folders of %s, several binaries were built" % reference.name)
+            continue
+        elif len(pids) > 1:
+            raise RuntimeError("several binaries built for %s, select one in benchmarks/package_ids: %s"
+                               % (reference.name, ", ".join(pids)))
+        layout = conan_api.app.cache.package_layout(reference)
+        package_folders[reference.name] = layout.package(PackageReference(reference, pids[0]))
+
+    env = dict(os.environ)
+    lib_folders = [os.path.join(f, d) for f in package_folders.values() for d in ("lib", "bin")]
+    for var in ("PATH", "LD_LIBRARY_PATH", "DYLD_LIBRARY_PATH"):
+        # an empty entry would add the current directory to the search path
+        env[var] = os.pathsep.join(lib_folders + ([env[var]] if env.get(var) else []))
+
+    results = {}
+    for benchmark in benchmarks.get('runs', []):
+        package_folder = package_folders.get(benchmark['package'])
+        if package_folder is None:
+            print("skip benchmark due to missing package: %s" % benchmark['name'])
+            continue
+
+        command = [os.path.join(package_folder, benchmark['command']), ] + [str(a) for a in benchmark.get('args', [])]
+        cwd = os.path.abspath(benchmark.get('cwd', package_folder))
+        timings, memory = [], []
+        for _ in range(benchmark.get('repeat', 3)):
+            elapsed, peak_memory = run_benchmark_command(command, cwd, env)
+            timings.append(elapsed)
+            memory.append(peak_memory)
+
+        # the fastest run is the least disturbed by other load on the machine
+        results[benchmark['name']] = {"time": min(timings),
+                                      "memory": max(memory) if None not in memory else None,
+                                      }
+        print("Benchmark %s: %.3fs, %s MB" % (benchmark['name'], results[benchmark['name']]['time'],
+                                              results[benchmark['name']]['memory']))
+
+    baseline_version, baseline = load_benchmark_baseline(baseline_folder, name, version)
+
+    regressions = []
+    if baseline is None:
+        print("No benchmark baseline found for versions before: %s" % version)
+    else:
+        for bench_name, result in results.items():
+            previous = baseline.get(bench_name)
+            if previous is None:
+                continue
+            benchmark = [b for b in benchmarks['runs'] if b['name'] == bench_name][0]
+            limits = {"time": benchmark.get('max_time_ratio', max_time_ratio),
+                      "memory": benchmark.get('max_memory_ratio', max_memory_ratio)}
+            for key, limit in limits.items():
+                if not result[key] or not previous.get(key):
+                    continue
+                ratio = result[key] / previous[key]
+                if ratio > limit:
+                    regressions.append("%s: %s %.2fx of %s (limit %.2fx)" % (bench_name, key, ratio,
+                                                                             baseline_version, limit))
+
+    for regression in regressions:
+        print("Performance regression: %s" % regression)
+
+    # a regressed build must not become the baseline for the next release
+    if not regressions:
+        if not os.path.exists(baseline_folder):
+            os.makedirs(baseline_folder)
+        yaml.dump(results, open(os.path.join(baseline_folder, "%s-%s.yml" % (name, version)), "w"))
+
+    return {'results': results,
+            'baseline_version': baseline_version,
+            'regressions': regressions,
+            }
+
+
+################################
+#
+#
+#
+################################
+def deploy_release(packages, config, regressions=None):
+    if regressions:
+        print("Deploy aborted due to performance regressions:\n  %s" % "\n  ".join(regressions))
+        return False
+
     if global_config["upload"]:
         conan_api, client_cache, user_io = Conan.factory()
         conan_repo = {v['name']: v['conanuser'] for v in config['dependencies']}
@@ -312,8 +657,9 @@ def deploy_release(packages, config):
             all_success = True
             for pid in package['package_ids']:
                 try:
-                    result = conan_api.upload(package['reference'], package=pid, confirm=True, remote_name=remote,
-                                              policy="force-upload")
+                    with conan_cache_lock():
+                        result = conan_api.upload(package['reference'], package=pid, confirm=True,
+                                                  remote_name=remote, policy="force-upload")
                 except Exception as e:
                     print(e)
                     all_success = False
@@ -335,11 +681,10 @@ def build_workspace(deps, build_folder, config):
 
     workspace_filename = os.path.join(os.curdir,build_folder, "conanws.yml")     
 
-    installFolder = os.path.join(os.curdir,"install")
-    installFolder = os.path.abspath(installFolder)
+    installFolder = os.path.abspath(WORKSPACE_INSTALL_FOLDER)
 
     # create install folder
-    # should the folder be cleared before installing? cases like renaming a pattern file
+    # stale files (e.g. renamed pattern files) are removed by the install sync using the per package manifests
     if not os.path.exists(installFolder):
         os.mkdir(installFolder)
         #shutil.rmtree(installFolder)
@@ -393,10 +738,25 @@ def build_workspace(deps, build_folder, config):
     build_parameter = ["*:workspaceBuild=True"]
     profile_name = global_config['profile_name'].split(",")
 
-    result = conan_api.workspace_install(build_folder, options=build_parameter, install_folder=installFolder, profile_name=profile_name)
+    with conan_cache_lock():
+        result = conan_api.workspace_install(build_folder, options=build_parameter, install_folder=installFolder, profile_name=profile_name)
 
     return {}
 
+def task_workspace_sync():
+    # sync the install folder after "make install" in the build folder of a workspace package:
+    # doit workspace=True workspace_sync
+    if not global_config["workspace"]:
+        return
+    yield {
+        'name': 'install',
+        'actions': [(workspace.ubitrackWorkspace.sync_workspace_install,
+                     [os.path.abspath(WORKSPACE_INSTALL_FOLDER), ConanOutput(sys.stdout)])],
+        'uptodate': [False],
+        'verbosity': 2,
+    }
+
+
 @create_after(executed='load_config', target_regex='package_worker_.*')
 def task_package_worker_gen():
     if not os.path.exists(BUILD_CONFIG_NAME):
@@ -404,11 +764,18 @@ def task_package_worker_gen():
 
     build_config = yaml.load(open(BUILD_CONFIG_NAME))
     deps = []
+    dep_infos = []
     for dep_info in build_config['dependencies']:
         name = dep_info["name"]
         if name in SKIP_PACKAGES:
             continue
 
+        # in pipeline mode all dependencies are handled by a single package_worker_pipeline task
+        if global_config["pipeline"]:
+            dep_infos.append(dep_info)
+            deps.append(name)
+            continue
+
         # first clone the dependency
         prepare_task_name = "package_worker_prepare_%s" % name
         yield {
@@ -417,7 +784,7 @@ def task_package_worker_gen():
             'actions': [(prepare_package_repository, [name, dep_info["gitrepo"], dep_info["gitbranch"]])],
             'params': [{'name': 'build_folder',
                         'short': 'f',
-                        'default': 'build'},
+                        'default': global_config["build_folder"]},
                        {'name': 'wipe',
                         'short': 'w',
                         'type': bool,
@@ -465,6 +832,28 @@ def task_package_worker_gen():
 
         deps.append(name)
 
+    if global_config["pipeline"]:
+        # clone, export and upload all dependencies as one overlapping pipeline
+        yield {
+            'name': 'package_worker_pipeline',
+            'file_dep': [BUILD_CONFIG_NAME,],
+            'actions': [(run_package_pipeline, [dep_infos,])],
+            'params': [{'name': 'build_folder',
+                        'short': 'f',
+                        'default': global_config["build_folder"]},
+                       {'name': 'wipe',
+                        'short': 'w',
+                        'type': bool,
+                        'default': False},
+                       ],
+            'getargs': {'config': ('load_config', "config"),
+                        },
+            'uptodate': [False,],
+            'verbosity': 2,
+        }
+        meta_uptodate = [result_dep("package_worker_gen:package_worker_pipeline")]
+    else:
+        meta_uptodate = [result_dep("package_worker_gen:package_worker_upload_%s" % n) for n in deps]
 
     
 
@@ -490,7 +879,7 @@ def task_package_worker_gen():
             'actions': [(build_workspace, [deps,])],
             'params': [{'name': 'build_folder',
                         'short': 'f',
-                        'default': 'build'},
+                        'default': global_config["build_folder"]},
                        ],
             'getargs': {'config': ('load_config', "config"),
                         },
@@ -511,7 +900,7 @@ def task_package_worker_gen():
             'getargs': {'meta_repo_folder': ('load_config', "meta_repo_folder"),
                         'config': ('load_config', "config"),
                         },
-            'uptodate': [result_dep("package_worker_gen:package_worker_upload_%s" % n) for n in deps],
+            'uptodate': meta_uptodate,
             'verbosity': 2,
            }
 
@@ -533,7 +922,7 @@ def task_package_worker_gen():
             'actions': [(build_release, [deps,])],
             'params': [{'name': 'build_folder',
                         'short': 'f',
-                        'default': 'build'},
+                        'default': global_config["build_folder"]},
                        ],
             'getargs': {'config': ('load_config', "config"),
                         },
@@ -541,14 +930,31 @@ def task_package_worker_gen():
             'verbosity': 2,
         }
 
+        deploy_getargs = {'packages': ('package_worker_gen:package_worker_build', "packages"),
+                          'config': ('load_config', "config"),
+                          }
+        deploy_uptodate = [result_dep('package_worker_gen:package_worker_build'), ]
+
+        # optionally compare the performance of the built packages against the previous release
+        if build_config.get('benchmarks'):
+            yield {
+                'name': 'package_worker_benchmark',
+                'actions': [(benchmark_release,)],
+                'getargs': {'packages': ('package_worker_gen:package_worker_build', "packages"),
+                            'config': ('load_config', "config"),
+                            },
+                'uptodate': [result_dep('package_worker_gen:package_worker_build'), ],
+                'verbosity': 2,
+            }
+            deploy_getargs['regressions'] = ('package_worker_gen:package_worker_benchmark', "regressions")
+            deploy_uptodate.append(result_dep('package_worker_gen:package_worker_benchmark'))
+
         # and deploy all resulting artefacts to the repository
         yield {
             'name': 'package_worker_deploy',
             'actions': [(deploy_release,)],
-            'getargs': {'packages': ('package_worker_gen:package_worker_build', "packages"),
-                        'config': ('load_config', "config"),
-                        },
-            'uptodate': [result_dep('package_worker_gen:package_worker_build'), ],
+            'getargs': deploy_getargs,
+            'uptodate': deploy_uptodate,
             'verbosity': 2,
         }
 
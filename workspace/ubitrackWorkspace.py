@@ -70,6 +70,8 @@ from conans.model.ref import ConanFileReference
 from conans.util.files import load, save
 
 import conans.client.cmd.build as _build
+import filecmp
+import shutil
 
 from conans.client.conan_api import get_graph_info
 
@@ -118,6 +120,114 @@ def workspace_install(self, path, settings=None, options=None, env=None,
         workspace.build(install_folder, deps_graph, self.app.out,self.app)
 
 
+MANIFEST_FOLDER = ".install_manifests"
+
+
+def _package_files(package_folder, build_folder, walk=True):
+    # cmake lists everything it installed during the last run, files left over
+    # from earlier runs in the package folder are not part of the package anymore
+    cmake_manifest = os.path.join(build_folder, "install_manifest.txt")
+    if os.path.exists(cmake_manifest):
+        files = [os.path.relpath(line.strip(), package_folder) for line in load(cmake_manifest).splitlines()
+                 if line.strip()]
+        return sorted(f.replace("\\", "/") for f in files if not f.startswith(".."))
+    if not walk:
+        return []
+
+    files = []
+    for root, _, filenames in os.walk(package_folder):
+        for filename in filenames:
+            files.append(os.path.relpath(os.path.join(root, filename), package_folder).replace("\\", "/"))
+    return sorted(files)
+
+
+def _is_unchanged(src, dst):
+    if os.path.islink(src) or os.path.islink(dst):
+        return os.path.islink(src) and os.path.islink(dst) and os.readlink(src) == os.readlink(dst)
+    return os.path.exists(dst) and (os.path.samefile(src, dst) or filecmp.cmp(src, dst))
+
+
+def _link_or_copy(src, dst):
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if os.path.islink(src):
+        # keep library symlinks (libfoo.so -> libfoo.so.1) as symlinks
+        os.symlink(os.readlink(src), dst)
+        return
+    try:
+        os.link(src, dst)
+    except OSError:
+        # different filesystem or no hard-link support
+        shutil.copy2(src, dst)
+
+
+def _load_manifest(manifest_file):
+    return yaml.safe_load(load(manifest_file)) if os.path.exists(manifest_file) else {}
+
+
+def sync_install_folder(name, package_folder, build_folder, install_folder, output):
+    # link only changed files into the install folder, remove the files this package does not install anymore
+    manifest_folder = os.path.join(install_folder, MANIFEST_FOLDER)
+    mkdir(manifest_folder)
+    manifest_file = os.path.join(manifest_folder, "%s.yml" % name)
+
+    previous = _load_manifest(manifest_file).get("files", [])
+    # a package installed directly into the install folder only needs its manifest and stale files removed
+    in_place = os.path.abspath(package_folder) == os.path.abspath(install_folder)
+    current = _package_files(package_folder, build_folder, walk=not in_place)
+
+    updated = 0
+    for rel_path in current:
+        src = os.path.join(package_folder, rel_path)
+        dst = os.path.join(install_folder, rel_path)
+        if not os.path.lexists(src) or os.path.isdir(src) and not os.path.islink(src):
+            continue
+        if _is_unchanged(src, dst):
+            continue
+        mkdir(os.path.dirname(dst))
+        _link_or_copy(src, dst)
+        updated += 1
+
+    # files still owned by another package must survive
+    owned = set(current)
+    for fname in os.listdir(manifest_folder):
+        if fname != "%s.yml" % name and fname.endswith(".yml"):
+            owned.update(_load_manifest(os.path.join(manifest_folder, fname)).get("files", []))
+
+    removed = 0
+    for rel_path in set(previous) - owned:
+        dst = os.path.join(install_folder, rel_path)
+        if os.path.lexists(dst):
+            os.remove(dst)
+            removed += 1
+        # drop directories that became empty
+        folder = os.path.dirname(dst)
+        while folder != install_folder and os.path.isdir(folder) and not os.listdir(folder):
+            os.rmdir(folder)
+            folder = os.path.dirname(folder)
+
+    manifest = {"package_folder": package_folder,
+                "build_folder": build_folder,
+                "files": current,
+                }
+    save(manifest_file, yaml.safe_dump(manifest, default_flow_style=False))
+    output.info("Install sync %s: %d updated, %d removed, %d unchanged"
+                % (name, updated, removed, len(current) - updated))
+
+
+def sync_workspace_install(install_folder, output):
+    # re-sync all packages of a previous workspace build, e.g. after "make install" in a build folder
+    manifest_folder = os.path.join(install_folder, MANIFEST_FOLDER)
+    if not os.path.exists(manifest_folder):
+        output.warn("No install manifests found in: %s" % install_folder)
+        return
+    for fname in sorted(os.listdir(manifest_folder)):
+        if fname.endswith(".yml"):
+            manifest = _load_manifest(os.path.join(manifest_folder, fname))
+            sync_install_folder(fname[:-len(".yml")], manifest["package_folder"], manifest["build_folder"],
+                                install_folder, output)
+
+
 def build(self, install_folder, graph, output, app):        
         if self._ws_generator == "cmake":
             cmake = ""
@@ -147,6 +257,9 @@ def build(self, install_folder, graph, output, app):
                     build = os.path.join(ws_pkg.root_folder, build).replace("\\", "/")
                     src = os.path.join(ws_pkg.root_folder, src).replace("\\", "/")
                     package_folder = os.path.join(build, 'package').replace("\\", "/")
+                    if os.path.abspath(build) == os.path.abspath(install_folder):
+                        # the meta package is built in the install folder itself (layout_gcc_ubitrack)
+                        package_folder = install_folder
                     
                     conanFilePath = os.path.join(ws_pkg.root_folder, src, "conanfile.py").replace("\\", "/")
                     #print("install folder "+install_folder)
@@ -155,7 +268,9 @@ def build(self, install_folder, graph, output, app):
                     #test=False, should_configure=True, should_build=True, should_install=True, should_test=True)
                     #build(app, conanfile_path, source_folder, build_folder, package_folder, install_folder,
                     #test=False, should_configure=True, should_build=True, should_install=True, should_test=True):
-                    _build.cmd_build(app,conanFilePath,src,build, install_folder, build)
+                    # install into the package folder first, then sync the changes into the shared install folder
+                    _build.cmd_build(app,conanFilePath,src,build, package_folder, build)
+                    sync_install_folder(ref.name, package_folder, build, install_folder, output)
 
 
 